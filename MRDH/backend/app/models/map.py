@@ -5,6 +5,7 @@ import json
 import os
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+import numpy as np
 from app.services.file_manager import FileManager
 
 class MapModel:
@@ -15,12 +16,28 @@ class MapModel:
         self.name = name
         self.width = width
         self.height = height
+        self.version = 0  # Bumped on every mutation, pathfinders drop cached results when it changes
         self.grid = [[0 for _ in range(width)] for _ in range(height)]  # Initialize as empty space
         self.entrance = {"x": 0, "y": 0}
         self.rooms = []
         self.created_at = datetime.now().isoformat()
         self.updated_at = datetime.now().isoformat()
     
+    @property
+    def grid(self) -> List[List[int]]:
+        """
+        Grid cells (0 empty, 1 obstacle, 2 entrance, 3 classroom door)
+        
+        Write single cells through set_cell or assign a whole new grid, both bump the version.
+        Writing grid[y][x] directly leaves pathfinders searching the old walkability snapshot.
+        """
+        return self._grid
+    
+    @grid.setter
+    def grid(self, grid: List[List[int]]):
+        self._grid = grid
+        self._mark_changed()
+    
     def to_dict(self) -> Dict:
         """Convert to dictionary format"""
         return {
@@ -103,6 +120,37 @@ class MapModel:
             return False
         return self.grid[y][x] != 1  # 1 means obstacle
     
+    def walkable_array(self) -> np.ndarray:
+        """Build walkability grid from the current grid as a uint8 array (1 walkable, 0 obstacle)"""
+        return np.ascontiguousarray(np.asarray(self.grid) != 1, dtype=np.uint8)
+    
+    def walkable_bits(self, walkable: np.ndarray = None) -> np.ndarray:
+        """
+        Pack a walkability grid into uint64 words, shape (height, ceil(width / 64))
+        
+        Packs the given walkable_array() snapshot, or the current grid when none is given.
+        Cell (x, y) is walkable when (bits[y, x >> 6] >> (x & 63)) & 1 is set
+        """
+        if walkable is None:
+            walkable = self.walkable_array()
+        height, width = walkable.shape
+        
+        # Pad rows to whole words, pack LSB-first so bit i of a word is column i
+        padded = np.zeros((height, (width + 63) // 64 * 64), dtype=np.uint8)
+        padded[:, :width] = walkable
+        packed = np.packbits(padded, axis=1, bitorder="little")
+        return np.ascontiguousarray(packed.view("<u8"), dtype=np.uint64)
+    
+    def set_cell(self, x: int, y: int, value: int):
+        """Set grid cell value"""
+        self._grid[y][x] = value
+        self._mark_changed()
+        self.updated_at = datetime.now().isoformat()
+    
+    def _mark_changed(self):
+        """Record a mutation, pathfinders drop their cached results when the version changes"""
+        self.version += 1
+    
     def get_neighbors(self, x: int, y: int) -> List[Tuple[int, int]]:
         """Get walkable neighbors of a position"""
         neighbors = []
@@ -140,6 +188,7 @@ class MapModel:
         
         # Mark as classroom door
         self.grid[y][x] = 3
+        self._mark_changed()
         self.updated_at = datetime.now().isoformat()
         return True
     
@@ -154,6 +203,7 @@ class MapModel:
         
         # Remove room from room list
         self.rooms = [r for r in self.rooms if r["id"] != room_id]
+        self._mark_changed()
         self.updated_at = datetime.now().isoformat()
         return True
     
@@ -170,5 +220,6 @@ class MapModel:
         # Set new entrance
         self.entrance = {"x": x, "y": y}
         self.grid[y][x] = 2
+        self._mark_changed()
         self.updated_at = datetime.now().isoformat()
         return True
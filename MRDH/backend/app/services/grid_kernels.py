@@ -0,0 +1,194 @@
+"""
+Grid search kernels compiled with Numba - BFS flood fill, A* with jump point search
+
+All kernels work on the bit-packed walkability grid from MapModel.walkable_bits() and
+flat cell indices (y * width + x). Run compile_kernels.py to build them ahead of time.
+The entry points release the GIL, so searches from concurrent request threads run in parallel.
+"""
+import heapq
+import numpy as np
+from numba import njit
+
+# Neighbor offsets: up, right, down, left (same order as pathfinding._DIRS; a global tuple is a compile-time constant for Numba)
+_DIRS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+@njit(cache=True, nogil=True)
+def bfs_grid(bits, w, h, sx, sy, ex, ey, max_len):
+    """BFS on a bit-packed walkability grid, return int32 predecessor array (-1 means unvisited)"""
+    n = w * h
+    parent = np.full(n, -1, dtype=np.int32)
+    dist = np.zeros(n, dtype=np.int32)
+    queue = np.empty(n, dtype=np.int32)
+    
+    start_idx = sy * w + sx
+    parent[start_idx] = start_idx
+    queue[0] = start_idx
+    head = 0
+    tail = 1
+    
+    while head < tail:
+        idx = queue[head]
+        head += 1
+        
+        # Check path length limit
+        if dist[idx] > max_len:
+            break
+        
+        x = idx % w
+        y = idx // w
+        for dx, dy in _DIRS:
+            nx = x + dx
+            ny = y + dy
+            if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                continue
+            
+            next_idx = ny * w + nx
+            if parent[next_idx] != -1:
+                continue
+            if not (bits[ny, nx >> 6] >> np.uint64(nx & 63)) & np.uint64(1):
+                continue
+            
+            parent[next_idx] = idx
+            dist[next_idx] = dist[idx] + 1
+            
+            if nx == ex and ny == ey:
+                return parent
+            
+            queue[tail] = next_idx
+            tail += 1
+    
+    return parent
+
+@njit(cache=True)
+def _is_open(bits, w, h, x, y):
+    """Bounds-checked walkability test on the bit-packed grid"""
+    if x < 0 or x >= w or y < 0 or y >= h:
+        return False
+    return ((bits[y, x >> 6] >> np.uint64(x & 63)) & np.uint64(1)) != 0
+
+@njit(cache=True)
+def _jump_horizontal(bits, w, h, x, y, dx, ex, ey):
+    """Scan from (x, y) along dx, return flat index of the next jump point or -1"""
+    while True:
+        x += dx
+        if not _is_open(bits, w, h, x, y):
+            return -1
+        if x == ex and y == ey:
+            return y * w + x
+        
+        # Forced neighbor: a side cell opens up right after a wall behind it
+        if (_is_open(bits, w, h, x, y - 1) and not _is_open(bits, w, h, x - dx, y - 1)) or \
+           (_is_open(bits, w, h, x, y + 1) and not _is_open(bits, w, h, x - dx, y + 1)):
+            return y * w + x
+
+@njit(cache=True)
+def _jump_vertical(bits, w, h, x, y, dy, ex, ey):
+    """Scan from (x, y) along dy, return flat index of the next jump point or -1"""
+    while True:
+        y += dy
+        if not _is_open(bits, w, h, x, y):
+            return -1
+        if x == ex and y == ey:
+            return y * w + x
+        
+        if (_is_open(bits, w, h, x - 1, y) and not _is_open(bits, w, h, x - 1, y - dy)) or \
+           (_is_open(bits, w, h, x + 1, y) and not _is_open(bits, w, h, x + 1, y - dy)):
+            return y * w + x
+        
+        # Vertical moves also stop where a horizontal scan would find a jump point
+        if _jump_horizontal(bits, w, h, x, y, 1, ex, ey) != -1 or \
+           _jump_horizontal(bits, w, h, x, y, -1, ex, ey) != -1:
+            return y * w + x
+
+@njit(cache=True, nogil=True)
+def jps_grid(bits, w, h, sx, sy, ex, ey, max_len):
+    """A* over jump points on a bit-packed walkability grid, return int32 predecessor array of jump points"""
+    n = w * h
+    parent = np.full(n, -1, dtype=np.int32)
+    g_score = np.full(n, -1, dtype=np.int32)
+    closed = np.zeros(n, dtype=np.uint8)
+    
+    start_idx = sy * w + sx
+    end_idx = ey * w + ex
+    parent[start_idx] = start_idx
+    g_score[start_idx] = 0
+    start_h = abs(sx - ex) + abs(sy - ey)
+    open_set = [(start_h, start_h, start_idx)]  # (f, h, index)
+    
+    while len(open_set) > 0:
+        _, _, idx = heapq.heappop(open_set)
+        if closed[idx]:
+            continue
+        if idx == end_idx:
+            # Shortest route is longer than the path length limit allows
+            if g_score[idx] > max_len + 1:
+                parent[end_idx] = -1
+            return parent
+        
+        closed[idx] = 1
+        g = g_score[idx]
+        
+        # Check path length limit
+        if g > max_len:
+            continue
+        
+        x = idx % w
+        y = idx // w
+        
+        # Direction of arrival, successors never turn straight back
+        parent_x = parent[idx] % w
+        parent_y = parent[idx] // w
+        in_dx = (x > parent_x) - (x < parent_x)
+        in_dy = (y > parent_y) - (y < parent_y)
+        
+        for dx, dy in _DIRS:
+            if idx != start_idx and dx == -in_dx and dy == -in_dy:
+                continue
+            
+            if dx != 0:
+                next_idx = _jump_horizontal(bits, w, h, x, y, dx, ex, ey)
+            else:
+                next_idx = _jump_vertical(bits, w, h, x, y, dy, ex, ey)
+            if next_idx == -1 or closed[next_idx]:
+                continue
+            
+            nx = next_idx % w
+            ny = next_idx // w
+            next_g = g + abs(nx - x) + abs(ny - y)
+            if g_score[next_idx] == -1 or next_g < g_score[next_idx]:
+                g_score[next_idx] = next_g
+                parent[next_idx] = idx
+                next_h = abs(nx - ex) + abs(ny - ey)
+                heapq.heappush(open_set, (next_g + next_h, next_h, next_idx))
+    
+    return parent
+
+@njit(cache=True, nogil=True)
+def trace_parent(parent, end_idx, w):
+    """Follow predecessor links from end back to start, return flat indices start-first
+    
+    Consecutive predecessors may be several cells apart on a straight line (jump points),
+    the cells in between are filled in.
+    """
+    length = 1
+    idx = end_idx
+    while parent[idx] != idx:
+        prev = parent[idx]
+        length += abs(idx % w - prev % w) + abs(idx // w - prev // w)
+        idx = prev
+    
+    indices = np.empty(length, dtype=np.int32)
+    k = length - 1
+    idx = end_idx
+    indices[k] = idx
+    while parent[idx] != idx:
+        prev = parent[idx]
+        if prev % w == idx % w:
+            step = w if prev > idx else -w
+        else:
+            step = 1 if prev > idx else -1
+        while idx != prev:
+            idx += step
+            k -= 1
+            indices[k] = idx
+    return indices
@@ -1,20 +1,82 @@
 """
-Pathfinding algorithm - BFS breadth-first search
+Pathfinding algorithm - A* search (over jump points in the compiled kernels), BFS flood fill for connectivity checks
 """
-from collections import deque
-from typing import List, Tuple, Optional, Dict
+import logging
+import os
+from collections import OrderedDict
+from typing import List, Tuple, Optional, Dict, Set, Sequence
+import numpy as np
 from app.models.map import MapModel
 
+logger = logging.getLogger(__name__)
+
+# Neighbor offsets: up, right, down, left
+_DIRS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# Integer direction codes: 0 north, 1 east, 2 south, 3 west, 4 unknown
+_CODE_NAMES = ("north", "east", "south", "west", "unknown")
+
+# Direction code of a step, indexed by (sign(dx) + 1) * 3 + (sign(dy) + 1)
+_SIGN_TO_CODE = np.array([
+    # dy: -1  0  1
+    4, 3, 4,  # dx -1: west
+    0, 4, 2,  # dx 0: north, south
+    4, 1, 4,  # dx 1: east
+], dtype=np.int32)
+
+# Turn instruction indexed by previous_code * 5 + next_code, "" when going straight, turning back or unknown
+_TURN_TABLE = (
+    # to: north     east          south         west          unknown
+    "",           "Turn right", "",           "Turn left",  "",  # from north
+    "Turn left",  "",           "Turn right", "",           "",  # from east
+    "",           "Turn left",  "",           "Turn right", "",  # from south
+    "Turn right", "",           "Turn left",  "",           "",  # from west
+    "",           "",           "",           "",           "",  # from unknown
+)
+
+def to_list_of_tuples(path: np.ndarray) -> List[Tuple[int, int]]:
+    """Convert an (N, 2) path array to the list of (x, y) tuples used by the API layer"""
+    return list(map(tuple, path.tolist()))
+
+# Search kernels: numba JIT, else fall back to the pure Python code paths. The ahead-of-time build
+# from compile_kernels.py (no JIT warm-up, no numba needed at runtime) is used only when
+# PATHFINDING_AOT_KERNELS=1, because nothing checks that it still matches grid_kernels.py, and
+# it holds the GIL
+HAS_KERNELS = False
+if os.environ.get('PATHFINDING_AOT_KERNELS') == '1':
+    try:
+        from app.services.bfs_native import bfs_grid, jps_grid, trace_parent
+        HAS_KERNELS = True
+    except ImportError:
+        logger.warning("PATHFINDING_AOT_KERNELS is set but bfs_native is not built, run compile_kernels.py")
+
+if not HAS_KERNELS:
+    try:
+        from app.services.grid_kernels import bfs_grid, jps_grid, trace_parent
+        HAS_KERNELS = True
+    except ImportError:
+        pass
+
 class BFSPathfinder:
-    """BFS pathfinder"""
+    """Grid pathfinder (A* for routes, BFS flood fill for connectivity)"""
     
     def __init__(self, map_model: MapModel):
         self.map = map_model
         self.max_path_length = 1000  # Maximum path length limit
+        self.path_cache_size = 256  # Maximum number of cached find_path results
+        self._path_cache = OrderedDict()  # (start, end, length limit) -> path, LRU order
+        self._reachable_cache = None  # Cells reachable from the entrance
+        self._reachable_key = None  # (entrance, length limit) the reachable set was built for
+        self._entrance_parent = None  # BFS predecessor array rooted at the entrance
+        self._entrance_width = 0
+        self._entrance_key = None  # (entrance, length limit) the entrance tree was built for
+        self._walkable = None  # Walkability snapshot every search on this instance reads
+        self._walk_bits = None  # Bit-packed copy of the snapshot for the compiled kernels
+        self._walkable_version = None  # Map version the snapshot was taken at
     
     def find_path(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
         """
-        Use BFS algorithm to find shortest path from start to end
+        Use A* algorithm (Manhattan heuristic, jump point search when compiled) to find shortest path from start to end
         
         Args:
             start: Start coordinates (x, y)
@@ -23,65 +85,169 @@ class BFSPathfinder:
         Returns:
             List of path points, or None if unreachable
         """
-        start_x, start_y = start
-        end_x, end_y = end
-        
-        # Check if start and end points are valid
-        if not self.map.is_walkable(start_x, start_y):
-            raise ValueError("Start point is not walkable")
+        path = self.find_path_array(start, end)
+        return to_list_of_tuples(path) if path is not None else None
+    
+    def find_path_array(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[np.ndarray]:
+        """
+        Same search as find_path, but return the path as an (N, 2) int32 array of (x, y) rows
         
-        if not self.map.is_walkable(end_x, end_y):
-            raise ValueError("End point is not walkable")
+        The array is shared with the result cache and is read-only. The cache lives on this
+        pathfinder instance, so it only helps callers that reuse one instance for repeated
+        queries; the API handlers build a fresh pathfinder per request and never hit it.
+        """
+        self._sync_walkable()
+        self._check_endpoints(start, end)
         
         # If start point is the end point
         if start == end:
-            return [start]
+            return np.array([start], dtype=np.int32)
         
-        # BFS initialization
-        queue = deque([(start_x, start_y, 0)])  # (x, y, distance)
-        visited = {(start_x, start_y): None}  # Record predecessor of each point
+        # Repeated queries on this instance are answered from the LRU cache, which
+        # _sync_walkable empties whenever the map version changes
+        key = (tuple(start), tuple(end), self.max_path_length)
+        if key in self._path_cache:
+            self._path_cache.move_to_end(key)
+            return self._path_cache[key]
         
-        # Directions: up, right, down, left
-        directions = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+        path = self._astar(start, end)
+        if path is not None:
+            path.flags.writeable = False
         
-        while queue:
-            current_x, current_y, distance = queue.popleft()
-            
-            # Check path length limit
-            if distance > self.max_path_length:
-                break
-            
-            # Check all neighbors
-            for dx, dy in directions:
-                next_x, next_y = current_x + dx, current_y + dy
+        self._path_cache[key] = path
+        if len(self._path_cache) > self.path_cache_size:
+            self._path_cache.popitem(last=False)
+        
+        return path
+    
+    def _astar(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[np.ndarray]:
+        """A* search between two valid, distinct points, over jump points in the compiled kernel"""
+        start_x, start_y = start
+        end_x, end_y = end
+        
+        if HAS_KERNELS:
+            return self._find_path_kernel(jps_grid, start, end)
+        
+        # A* initialization. The walkability grid gets a one-cell wall border so neighbors need no bounds
+        # checks, and per-cell state lives in flat arrays indexed by (y + 1) * width + (x + 1) on that grid
+        walkable = np.pad(self._walkable, 1).tobytes()  # One byte per cell, 1 walkable
+        width = self._walkable.shape[1] + 2
+        size = len(walkable)
+        start_idx = (start_y + 1) * width + start_x + 1
+        end_idx = (end_y + 1) * width + end_x + 1
+        offsets = tuple(dy * width + dx for dx, dy in _DIRS)
+        
+        parent = [-1] * size  # Predecessor index of each cell, -1 means unvisited
+        g_score = [-1] * size
+        closed = bytearray(size)
+        parent[start_idx] = start_idx  # Start is its own parent
+        g_score[start_idx] = 0
+        
+        # Unit steps and a consistent heuristic mean f = g + h only grows by 0 or 2 per step and never
+        # drops below the f being expanded, so a bucket queue indexed by f - start_h replaces the heap.
+        # Buckets pop LIFO, which prefers the most recently reached (closest to goal) cells on ties
+        start_h = abs(start_x - end_x) + abs(start_y - end_y)
+        buckets = [[start_idx]]
+        level = 0
+        
+        while level < len(buckets):
+            bucket = buckets[level]
+            while bucket:
+                current_idx = bucket.pop()
+                if closed[current_idx]:
+                    continue
                 
-                # Check if it is walkable and not visited
-                if (next_x, next_y) not in visited and self.map.is_walkable(next_x, next_y):
-                    visited[(next_x, next_y)] = (current_x, current_y)
-                    
-                    # Check if it has reached the target
-                    if next_x == end_x and next_y == end_y:
-                        return self._reconstruct_path(visited, start, end)
+                # Check if it has reached the target, shifting coordinates back off the border
+                if current_idx == end_idx:
+                    return np.array(self._reconstruct_path(parent, end_idx, width), dtype=np.int32) - 1
+                
+                closed[current_idx] = 1
+                distance = g_score[current_idx]
+                
+                # Check path length limit
+                if distance > self.max_path_length:
+                    continue
+                
+                # Relax every open neighbor whose route gets shorter through this cell
+                next_g = distance + 1
+                for offset in offsets:
+                    next_idx = current_idx + offset
+                    if closed[next_idx] or not walkable[next_idx]:
+                        continue
                     
-                    queue.append((next_x, next_y, distance + 1))
+                    if g_score[next_idx] == -1 or next_g < g_score[next_idx]:
+                        g_score[next_idx] = next_g
+                        parent[next_idx] = current_idx
+                        next_y, next_x = divmod(next_idx, width)
+                        next_level = next_g + abs(next_x - 1 - end_x) + abs(next_y - 1 - end_y) - start_h
+                        while next_level >= len(buckets):
+                            buckets.append([])
+                        buckets[next_level].append(next_idx)
+            level += 1
         
         # Unable to find path
         return None
     
-    def _reconstruct_path(self, visited: Dict, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
-        """Reconstruct path from visited dictionary"""
-        path = []
-        current = end
+    def _sync_walkable(self):
+        """
+        Rebuild the walkability snapshot and drop cached results when the map version changed
+        
+        Only MapModel mutators bump the version, so cells must be written through set_cell
+        (or by assigning a whole new grid), never with grid[y][x] = value.
+        """
+        if self._walkable is not None and self._walkable_version == self.map.version:
+            return
+        
+        walkable = self.map.walkable_array()
+        self._walkable = walkable
+        self._walk_bits = self.map.walkable_bits(walkable) if HAS_KERNELS else None
+        self._walkable_version = self.map.version
+        self._path_cache.clear()
+        self._entrance_parent = None
+        self._reachable_cache = None
+    
+    def _check_endpoints(self, start: Tuple[int, int], end: Tuple[int, int]):
+        """Check if start and end points are valid on the walkability snapshot"""
+        if not self._is_walkable(start[0], start[1]):
+            raise ValueError("Start point is not walkable")
         
-        while current is not None:
-            path.append(current)
-            current = visited[current]
+        if not self._is_walkable(end[0], end[1]):
+            raise ValueError("End point is not walkable")
+    
+    def _is_walkable(self, x: int, y: int) -> bool:
+        """Check if position is walkable on the snapshot taken by _sync_walkable"""
+        height, width = self._walkable.shape
+        return 0 <= x < width and 0 <= y < height and bool(self._walkable[y, x])
+    
+    def _find_path_kernel(self, kernel, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Run a compiled search kernel on the map's bit-packed walkability grid"""
+        height, width = self._walkable.shape
+        
+        parent = kernel(self._walk_bits, width, height, start[0], start[1], end[0], end[1], self.max_path_length)
+        end_idx = end[1] * width + end[0]
+        if parent[end_idx] == -1:
+            return None
+        
+        indices = trace_parent(parent, end_idx, width)
+        path = np.empty((len(indices), 2), dtype=np.int32)
+        path[:, 0] = indices % width
+        path[:, 1] = indices // width
+        return path
+    
+    def _reconstruct_path(self, parent: List[int], end_idx: int, width: int) -> List[Tuple[int, int]]:
+        """Reconstruct path by following flat predecessor indices back to the start"""
+        path = [(end_idx % width, end_idx // width)]
+        current = end_idx
+        
+        while parent[current] != current:
+            current = parent[current]
+            path.append((current % width, current // width))
         
         path.reverse()
         return path
     
     def find_path_to_room(self, room_id: str) -> Optional[List[Tuple[int, int]]]:
-        """Path from entrance to specified room"""
+        """Path from entrance to specified room, read from the shared entrance BFS tree"""
         room = self.map.find_room_by_id(room_id)
         if not room:
             return None
@@ -89,19 +255,108 @@ class BFSPathfinder:
         start = (self.map.entrance["x"], self.map.entrance["y"])
         end = (room["x"], room["y"])
         
-        return self.find_path(start, end)
+        self._sync_walkable()
+        self._check_endpoints(start, end)
+        
+        if start == end:
+            return [start]
+        
+        parent, width = self._entrance_tree()
+        end_idx = end[1] * width + end[0]
+        if parent[end_idx] == -1:
+            return None
+        
+        if HAS_KERNELS:
+            indices = trace_parent(parent, end_idx, width)
+            return list(zip((indices % width).tolist(), (indices // width).tolist()))
+        return self._reconstruct_path(parent, end_idx, width)
+    
+    def _entrance_tree(self) -> Tuple[Sequence[int], int]:
+        """
+        BFS predecessor array covering everything reachable from the (walkable) entrance
+        
+        Computed once per walkability snapshot, entrance and path length limit, so any number of entrance -> room
+        queries cost one search plus a parent-pointer walk each.
+        
+        Returns:
+            (parent, width): flat predecessor indices (-1 unreachable, entrance is its own
+            parent) and the row length used to index them
+        """
+        key = (self.map.entrance["x"], self.map.entrance["y"], self.max_path_length)
+        if self._entrance_parent is not None and self._entrance_key == key:
+            return self._entrance_parent, self._entrance_width
+        
+        start_x, start_y = self.map.entrance["x"], self.map.entrance["y"]
+        
+        if HAS_KERNELS:
+            height, width = self._walkable.shape
+            
+            # A target outside the grid makes the kernel flood the whole component
+            parent = bfs_grid(self._walk_bits, width, height, start_x, start_y, -1, -1, self.max_path_length)
+        else:
+            # BFS initialization, queue holds flat indices (y * width + x) and depth lives in a parallel array
+            height, width = self._walkable.shape
+            size = width * height
+            start_idx = start_y * width + start_x
+            parent = [-1] * size  # -1 means unvisited
+            depth = [0] * size
+            parent[start_idx] = start_idx
+            queue = [start_idx]
+            head = 0
+            
+            while head < len(queue):
+                current_idx = queue[head]
+                head += 1
+                distance = depth[current_idx]
+                
+                # Check path length limit
+                if distance > self.max_path_length:
+                    break
+                
+                current_y, current_x = divmod(current_idx, width)
+                for dx, dy in _DIRS:
+                    next_x, next_y = current_x + dx, current_y + dy
+                    
+                    if self._is_walkable(next_x, next_y):
+                        next_idx = next_y * width + next_x
+                        if parent[next_idx] == -1:
+                            parent[next_idx] = current_idx
+                            depth[next_idx] = distance + 1
+                            queue.append(next_idx)
+        
+        self._entrance_parent = parent
+        self._entrance_width = width
+        self._entrance_key = key
+        return parent, width
+    
+    def _compute_reachable_set(self) -> Set[Tuple[int, int]]:
+        """Flood fill from the entrance once, return every reachable cell"""
+        # Sync first, it drops the cached set when the map changed
+        self._sync_walkable()
+        key = (self.map.entrance["x"], self.map.entrance["y"], self.max_path_length)
+        if self._reachable_cache is not None and self._reachable_key == key:
+            return self._reachable_cache
+        
+        start_x, start_y = self.map.entrance["x"], self.map.entrance["y"]
+        if not self._is_walkable(start_x, start_y):
+            reachable = set()
+        else:
+            parent, width = self._entrance_tree()
+            indices = np.flatnonzero(np.asarray(parent) != -1)
+            reachable = set(zip((indices % width).tolist(), (indices // width).tolist()))
+        
+        self._reachable_cache = reachable
+        self._reachable_key = key
+        return reachable
     
     def check_connectivity(self) -> Dict:
         """Check map connectivity, return reachable and unreachable rooms"""
-        entrance = (self.map.entrance["x"], self.map.entrance["y"])
+        reachable = self._compute_reachable_set()
         reachable_rooms = []
         unreachable_rooms = []
         
         for room in self.map.rooms:
-            room_pos = (room["x"], room["y"])
-            path = self.find_path(entrance, room_pos)
-            
-            if path:
+            if (room["x"], room["y"]) in reachable:
                 reachable_rooms.append(room["id"])
             else:
                 unreachable_rooms.append(room["id"])
@@ -114,8 +369,8 @@ class BFSPathfinder:
         }
     
     def estimate_time(self, path: List[Tuple[int, int]], speed_per_step: float = 1.0) -> float:
-        """Estimate navigation time (seconds)"""
-        if not path:
+        """Estimate navigation time (seconds), path may be a point list or an (N, 2) array"""
+        if path is None or len(path) == 0:
             return 0
         
         # Base time: each step 1 second
@@ -126,138 +381,90 @@ class BFSPathfinder:
         
         return base_time + turn_time
     
-    def _count_turns(self, path: List[Tuple[int, int]]) -> int:
+    def _count_turns(self, path: np.ndarray) -> int:
         """Count turns in the path"""
         if len(path) < 3:
             return 0
         
-        turns = 0
-        for i in range(1, len(path) - 1):
-            prev_x, prev_y = path[i - 1]
-            curr_x, curr_y = path[i]
-            next_x, next_y = path[i + 1]
-            
-            # Calculate direction vector
-            dir1 = (curr_x - prev_x, curr_y - prev_y)
-            dir2 = (next_x - curr_x, next_y - curr_y)
-            
-            # If direction changes, it is a turn
-            if dir1 != dir2:
-                turns += 1
-        
-        return turns
+        # A turn is any point where the step vector differs from the previous one
+        steps = np.diff(np.asarray(path, dtype=np.int32), axis=0)
+        return int(np.count_nonzero((steps[1:] != steps[:-1]).any(axis=1)))
 
 class NavigationInstructions:
     """Navigation instruction generator"""
     
-    def __init__(self):
-        # Direction mapping
-        self.directions = {
-            (0, -1): "north",
-            (1, 0): "east", 
-            (0, 1): "south",
-            (-1, 0): "west"
-        }
-        
-        # Turn instruction mapping
-        self.turn_instructions = {
-            ("north", "east"): "Turn right",
-            ("north", "west"): "Turn left",
-            ("east", "south"): "Turn right",
-            ("east", "north"): "Turn left",
-            ("south", "west"): "Turn right",
-            ("south", "east"): "Turn left",
-            ("west", "north"): "Turn right",
-            ("west", "south"): "Turn left"
-        }
-    
     def generate_instructions(self, path: List[Tuple[int, int]], target_room: str = None) -> List[str]:
         """Generate template-compatible English navigation instructions"""
-        if not path or len(path) < 2:
+        if path is None or len(path) < 2:
             return ["You have reached your destination"]
         
         instructions = ["Start navigation. Please follow the guidance"]
-        i = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        points = np.asarray(path, dtype=np.int32)
+        segments = self._segment_path(points)
         
-        while i < len(path) - 1:
-            # Calculate current direction
-            current_pos = path[i]
-            next_pos = path[i + 1]
-            direction = self._get_direction(current_pos, next_pos)
-            
-            # Calculate number of consecutive straight steps
-            steps = 1
-            j = i + 1
-            
-            while j < len(path) - 1:
-                next_direction = self._get_direction(path[j], path[j + 1])
-                if next_direction == direction:
-                    steps += 1
-                    j += 1
-                else:
-                    break
-            
-            # 生成包含步数的指令（带调试信息）
-            print(f"📍 位置 {current_pos} → {path[j]}, 方向: {direction}, 步数: {steps}")
+        for k, (start, end, code) in enumerate(segments):
+            steps = end - start
             
+            # Generate instructions that include the number of steps
             if steps == 1:
                 inst = "Walk 1 step forward"
             else:
                 inst = f"Walk {steps} steps forward"
             instructions.append(inst)
-            print(f"   指令: {inst}")
             
-            i = j
+            if debug:
+                logger.debug("Segment %s -> %s, direction: %s, steps: %d, instruction: %s",
+                             tuple(points[start].tolist()), tuple(points[end].tolist()), _CODE_NAMES[code], steps, inst)
             
             # If there is another segment, generate turn instructions
-            if i < len(path) - 1:
-                next_direction = self._get_direction(path[i], path[i + 1])
-                turn_instruction = self.turn_instructions.get((direction, next_direction))
+            if k + 1 < len(segments):
+                turn_instruction = _TURN_TABLE[code * 5 + segments[k + 1][2]]
                 if turn_instruction:
                     instructions.append(turn_instruction)
-                    print(f"   指令: {turn_instruction}")
+                    if debug:
+                        logger.debug("Turn at %s: %s", tuple(points[end].tolist()), turn_instruction)
         
         # Add arrival instructions
         instructions.append("You have reached your destination")
-        print(f"\n✓ 总共生成 {len(instructions)} 条指令\n")
+        if debug:
+            logger.debug("Generated %d instructions", len(instructions))
         
         return instructions
     
-    def _get_direction(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> str:
-        """Get direction from one position to another"""
-        dx = to_pos[0] - from_pos[0]
-        dy = to_pos[1] - from_pos[1]
+    def _segment_path(self, path: np.ndarray) -> List[Tuple[int, int, int]]:
+        """Split path into straight runs, return (start index, end index, direction code) per run"""
+        # One direction code per step, computed for the whole path at once
+        diff = np.diff(np.asarray(path, dtype=np.int32), axis=0)
+        codes = _SIGN_TO_CODE[(np.sign(diff[:, 0]) + 1) * 3 + (np.sign(diff[:, 1]) + 1)]
         
-        direction_vector = (1 if dx > 0 else -1 if dx < 0 else 0,
-                           1 if dy > 0 else -1 if dy < 0 else 0)
+        # Only the change points are visited in Python
+        boundaries = (np.flatnonzero(codes[1:] != codes[:-1]) + 1).tolist()
+        starts = [0] + boundaries
+        ends = boundaries + [len(codes)]
+        start_codes = codes[starts].tolist()
         
-        return self.directions.get(direction_vector, "unknown")
+        return list(zip(starts, ends, start_codes))
     
     def generate_detailed_instructions(self, path: List[Tuple[int, int]], target_room: str = None) -> List[Dict]:
         """Generate detailed navigation instructions (include position information)"""
-        if not path or len(path) < 2:
+        if path is None or len(path) < 2:
             return [{"step": 1, "action": "ARRIVED", "description": "You are already at your destination"}]
         
+        # Work on the x and y columns separately, as plain ints for the JSON output
+        points = np.asarray(path, dtype=np.int32)
+        xs = points[:, 0].tolist()
+        ys = points[:, 1].tolist()
+        
         detailed_instructions = []
         step_number = 1
-        i = 0
+        segments = self._segment_path(points)
         
-        while i < len(path) - 1:
-            current_pos = path[i]
-            next_pos = path[i + 1]
-            direction = self._get_direction(current_pos, next_pos)
-            
-            # Calculate number of consecutive straight steps
-            steps = 1
-            j = i + 1
-            
-            while j < len(path) - 1:
-                next_direction = self._get_direction(path[j], path[j + 1])
-                if next_direction == direction:
-                    steps += 1
-                    j += 1
-                else:
-                    break
+        for k, (start, end, code) in enumerate(segments):
+            steps = end - start
+            direction = _CODE_NAMES[code]
+            current_pos = (xs[start], ys[start])
+            end_pos = (xs[end], ys[end])
             
             # Generate detailed straight instructions
             instruction = {
@@ -266,32 +473,30 @@ class NavigationInstructions:
                 "distance": steps,
                 "description": f"Go straight for {steps} step{'s' if steps > 1 else ''}",
                 "current_position": {"x": current_pos[0], "y": current_pos[1]},
-                "next_position": {"x": path[j][0], "y": path[j][1]},
+                "next_position": {"x": end_pos[0], "y": end_pos[1]},
                 "direction": direction
             }
             detailed_instructions.append(instruction)
             step_number += 1
             
-            i = j
-            
             # If there is another segment, generate turn instructions
-            if i < len(path) - 1:
-                next_direction = self._get_direction(path[i], path[i + 1])
-                turn_instruction = self.turn_instructions.get((direction, next_direction))
+            if k + 1 < len(segments):
+                next_code = segments[k + 1][2]
+                turn_instruction = _TURN_TABLE[code * 5 + next_code]
                 if turn_instruction:
                     instruction = {
                         "step": step_number,
                         "action": "TURN",
                         "description": turn_instruction,
-                        "current_position": {"x": path[i][0], "y": path[i][1]},
+                        "current_position": {"x": end_pos[0], "y": end_pos[1]},
                         "from_direction": direction,
-                        "to_direction": next_direction
+                        "to_direction": _CODE_NAMES[next_code]
                     }
                     detailed_instructions.append(instruction)
                     step_number += 1
         
         # Add arrival instructions
-        final_pos = path[-1]
+        final_pos = (xs[-1], ys[-1])
         arrival_instruction = {
             "step": step_number,
             "action": "ARRIVED",
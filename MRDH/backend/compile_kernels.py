@@ -0,0 +1,48 @@
+"""
+Ahead-of-time build of the grid search kernels
+
+Compiles app/services/grid_kernels.py into the extension module app/services/bfs_native.
+The built module only needs numpy at runtime, and the first request no longer pays Numba's
+import and compile cost.
+
+pathfinding.py imports it instead of the JIT kernels only when PATHFINDING_AOT_KERNELS=1 is
+set. Nothing checks it against the kernel source, so rebuild after every change to
+grid_kernels.py. The exported functions also hold the GIL, unlike the nogil JIT kernels.
+
+numba.pycc is pending deprecation in Numba (building prints NumbaPendingDeprecationWarning);
+if it is removed, leave the variable unset and the JIT kernels are used.
+
+Usage (from the backend directory, numba required):
+    python compile_kernels.py
+    PATHFINDING_AOT_KERNELS=1 python run.py
+"""
+import os
+import sys
+
+# Add current directory to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from numba.pycc import CC
+from app.services import grid_kernels
+
+# Integer arguments are int64, the type Python ints get under the JIT
+KERNEL_SIGNATURES = {
+    "bfs_grid": "i4[::1](u8[:, ::1], i8, i8, i8, i8, i8, i8, i8)",
+    "jps_grid": "i4[::1](u8[:, ::1], i8, i8, i8, i8, i8, i8, i8)",
+    "trace_parent": "i4[::1](i4[::1], i8, i8)",
+}
+
+def build(output_dir: str = None):
+    """Compile every exported kernel into the bfs_native extension module"""
+    cc = CC("bfs_native")
+    cc.output_dir = output_dir or os.path.join(current_dir, "app", "services")
+    
+    for name, signature in KERNEL_SIGNATURES.items():
+        cc.export(name, signature)(getattr(grid_kernels, name).py_func)
+    
+    cc.compile()
+    print(f"Kernels compiled to {cc.output_dir}")
+
+if __name__ == "__main__":
+    build()